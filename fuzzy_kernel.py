@@ -0,0 +1,94 @@
+"""Compiled fuzzy-inference kernels for the tipping app.
+
+Running ``python fuzzy_kernel.py`` AOT-compiles the kernels into a C
+extension (``fuzzy_kernel_aot``) so a fresh process pays no JIT warmup
+on the first slider interaction. When that build is absent the
+@njit(cache=True) versions below are used instead.
+"""
+import numpy as np
+from numba import njit
+from numba.pycc import CC
+
+cc = CC('fuzzy_kernel_aot')
+
+
+@njit(cache=True)
+@cc.export('trimf_scalar', 'f8(f8, f8, f8, f8)')
+def trimf_scalar(x, a, b, c):
+    # Analytical triangular MF value - no universe array or interp needed
+    rising = (x - a) / (b - a) if b > a else 1.0
+    falling = (c - x) / (c - b) if c > b else 1.0
+    return max(0.0, min(rising, falling))
+
+
+@njit(cache=True)
+@cc.export('infer_activations', 'f4[:, :](f8, f8, f8, f8, f8, f4[:, :])')
+def infer_activations(qual_lo, qual_hi, serv_lo, serv_md, serv_hi, tip_mf_stack):
+    # Rule firing from already-fuzzified membership grades - the app
+    # computes them once for display, so they are not recomputed here
+    # Rule 1: bad quality OR bad service -> low tip
+    # Rule 2: decent service -> medium tip
+    # Rule 3: great quality OR great service -> high tip
+    strengths = np.array([max(qual_lo, serv_lo), serv_md, max(qual_hi, serv_hi)],
+                         dtype=np.float32)
+
+    # Clip all three output sets in one broadcast instead of a
+    # np.fmin call (and temporary) per rule
+    return np.minimum(tip_mf_stack, strengths.reshape(3, 1))
+
+
+@njit(cache=True)
+def aggregated_membership(x, s1, s2, s3):
+    # Union of the three clipped tip sets at a single point
+    mu1 = min(s1, (12.5 - x) / 12.5)
+    mu2 = min(s2, min(x / 12.5, (25.0 - x) / 12.5))
+    mu3 = min(s3, (x - 12.5) / 12.5)
+    return max(0.0, max(mu1, max(mu2, mu3)))
+
+
+@njit(cache=True)
+@cc.export('defuzz_exact', 'f8(f8, f8, f8)')
+def defuzz_exact(s1, s2, s3):
+    # Closed-form centroid of the aggregated output set. The aggregate
+    # is piecewise linear with kinks only at the tip-triangle vertices,
+    # the clip corners and the pairwise crossings of the segment lines,
+    # so trapezoid moments over those breakpoints are exact - no
+    # dependence on the tip universe's sampling resolution.
+    xs = np.empty(17)
+    xs[0] = 0.0
+    xs[1] = 6.25
+    xs[2] = 12.5
+    xs[3] = 18.75
+    xs[4] = 25.0
+    k = 5
+    for s in (s1, s2, s3):
+        xs[k] = 12.5 * s
+        xs[k + 1] = 12.5 * (1.0 - s)
+        xs[k + 2] = 25.0 - 12.5 * s
+        xs[k + 3] = 12.5 * (1.0 + s)
+        k += 4
+    xs = np.sort(xs)
+
+    num = 0.0
+    den = 0.0
+    for i in range(1, 17):
+        x1 = xs[i - 1]
+        x2 = xs[i]
+        if x2 <= x1:
+            continue
+        y1 = aggregated_membership(x1, s1, s2, s3)
+        y2 = aggregated_membership(x2, s1, s2, s3)
+        den += (x2 - x1) * (y1 + y2) / 2.0
+        num += (x2 - x1) * (y1 * (2.0 * x1 + x2) + y2 * (x1 + 2.0 * x2)) / 6.0
+    return num / den
+
+
+try:
+    # Prefer the AOT build when it has been compiled
+    from fuzzy_kernel_aot import defuzz_exact, infer_activations, trimf_scalar  # noqa: F811
+except ImportError:
+    pass
+
+
+if __name__ == '__main__':
+    cc.compile()
@@ -1,8 +1,15 @@
 import streamlit as st
 import numpy as np
 import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-import matplotlib.pyplot as plt
+import pandas as pd
+import altair as alt
+from fuzzy_kernel import defuzz_exact, infer_activations, trimf_scalar
+
+try:
+    # Optional C-extension pipeline (cythonize -i fuzzy_tip.pyx)
+    from fuzzy_tip import defuzz_tip
+except ImportError:
+    defuzz_tip = None
 
 # --- Streamlit setup ---
 st.set_page_config(layout="centered")
@@ -10,231 +17,264 @@ st.title("💸 Tipping Problem - Fuzzy Logic")
 st.divider()
 st.header("Fuzzification")
 
-# --- Fuzzy universe definitions ---
-quality_range = np.arange(0, 11, 1)
-service_range = np.arange(0, 11, 1)
-tip_range = np.arange(0, 26, 1)
+# --- Fuzzy universes and membership functions ---
+# Triangle parameters (a, b, c) per label, shared by the sampled MF
+# construction below and the closed-form scalar evaluation
+quality_params = [(0, 0, 5), (0, 5, 10), (5, 10, 10)]
+service_params = [(0, 0, 5), (0, 5, 10), (5, 10, 10)]
+tip_params = [(0, 0, 12.5), (0, 12.5, 25), (12.5, 25, 25)]
+
+
+# Cached so slider reruns reuse the arrays instead of rebuilding them
+@st.cache_data
+def build_membership_functions():
+    # float32 is plenty for MF grades and halves the bytes every
+    # downstream ufunc and plot call has to move
+    quality_range = np.arange(0, 11, 1, dtype=np.float32)
+    service_range = np.arange(0, 11, 1, dtype=np.float32)
+    tip_range = np.arange(0, 26, 1, dtype=np.float32)
 
-# --- Membership functions ---
-# Quality
-quality_low = fuzz.trimf(quality_range, [0, 0, 5])
-quality_medium = fuzz.trimf(quality_range, [0, 5, 10])
-quality_high = fuzz.trimf(quality_range, [5, 10, 10])
+    # Both input variables share the same universe, so their MFs pack
+    # into one contiguous (n_vars, n_labels, n_points) tensor; the tip
+    # MFs form a (n_labels, n_points) matrix on their own universe
+    input_mfs = np.stack([
+        [fuzz.trimf(quality_range, p) for p in quality_params],
+        [fuzz.trimf(service_range, p) for p in service_params],
+    ]).astype(np.float32, copy=False)
+    tip_mfs = np.stack([fuzz.trimf(tip_range, p) for p in tip_params]).astype(np.float32, copy=False)
 
-# Service
-service_low = fuzz.trimf(service_range, [0, 0, 5])
-service_medium = fuzz.trimf(service_range, [0, 5, 10])
-service_high = fuzz.trimf(service_range, [5, 10, 10])
+    return quality_range, service_range, tip_range, input_mfs, tip_mfs
 
-# Tip
-tip_low = fuzz.trimf(tip_range, [0, 0, 12.5])
-tip_medium = fuzz.trimf(tip_range, [0, 12.5, 25])
-tip_high = fuzz.trimf(tip_range, [12.5, 25, 25])
 
-# --- User inputs ---
-col1, col2 = st.columns(2)
-with col1:
-    quality_score = st.slider("Rate the *Food Quality*", 0, 10, 5, 1)
-with col2:
-    service_score = st.slider("Rate the *Service*", 0, 10, 5, 1)
+(quality_range, service_range, tip_range,
+ input_mfs, tip_mfs) = build_membership_functions()
+quality_mfs, service_mfs = input_mfs
+quality_low, quality_medium, quality_high = quality_mfs
+service_low, service_medium, service_high = service_mfs
+tip_low, tip_medium, tip_high = tip_mfs
 
 
 # --- Membership value calculations ---
-def get_membership_values(x_range, functions, value):
-    return [fuzz.interp_membership(x_range, mf, value) for mf in functions]
+def get_membership_values(params, value):
+    # Closed-form evaluation from the triangle parameters; the sampled
+    # universe arrays are only needed for plotting
+    return [trimf_scalar(float(value), a, b, c) for a, b, c in params]
+
+
+# --- Plot helpers ---
+# Charts are rendered client-side by altair: a rerun ships a few hundred
+# bytes of JSON spec instead of rasterizing a matplotlib figure to PNG
+mf_colors = ['#1f77b4', '#2ca02c', '#d62728']  # Blue, Green, Red
 
 
-quality_membership = get_membership_values(quality_range, [quality_low, quality_medium, quality_high], quality_score)
-service_membership = get_membership_values(service_range, [service_low, service_medium, service_high], service_score)
+def melt_mfs(x, functions, labels):
+    # Long-form frame for altair: one row per (x, label) sample
+    return pd.DataFrame({
+        'x': np.tile(x, len(labels)),
+        'membership': np.concatenate(functions),
+        'label': np.repeat(labels, len(x)),
+    })
 
 
 # --- Membership plot function ---
 def plot_membership(x, functions, score, title):
-    fig, ax = plt.subplots(figsize=(6, 3))
-
-    colors = ['#1f77b4', '#2ca02c', '#d62728']  # Blue, Green, Red
     labels = ['Bad', 'Decent', 'Great']
 
-    for func, color, label in zip(functions, colors, labels):
-        ax.plot(x, func, color=color, linewidth=2.5, label=label, alpha=0.9)
+    lines = alt.Chart(melt_mfs(x, functions, labels)).mark_line(strokeWidth=2.5, opacity=0.9).encode(
+        x=alt.X('x:Q', title=None, axis=alt.Axis(values=x.tolist())),
+        y=alt.Y('membership:Q', title=None, scale=alt.Scale(domain=[-0.05, 1.05])),
+        color=alt.Color('label:N', title=None, sort=None,
+                        scale=alt.Scale(domain=labels, range=mf_colors),
+                        legend=alt.Legend(orient='bottom')),
+    )
 
     # Vertical line for the selected score
-    ax.axvline(score, color="black", linestyle="--", linewidth=1.5)
-
-    # Minimalist styling
-    ax.set_title(title, fontsize=14, weight='bold')
-    ax.set_ylim([-0.05, 1.05])
-    ax.set_xlim([min(x), max(x)])
-    ax.set_xticks(np.arange(min(x), max(x)+1, 1))
-    ax.grid(True, which='both', linestyle='--', linewidth=0.4, alpha=0.3)
-
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-
-    ax.tick_params(axis='both', labelsize=10)
-    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=3, frameon=False)
-
-    fig.tight_layout()
-    return fig
-
-
-
-# --- Show plots and membership values ---
-col3, col4 = st.columns(2)
-with col3:
-    fig = plot_membership(quality_range, [quality_low, quality_medium, quality_high], quality_score, "Food Quality")
-    st.pyplot(fig)
-    st.subheader("Membership Values (Quality)")
-    qc1, qc2, qc3 = st.columns(3)
-    qc1.metric("Bad", f"{quality_membership[0]:.2f}")
-    qc2.metric("Decent", f"{quality_membership[1]:.2f}")
-    qc3.metric("Great", f"{quality_membership[2]:.2f}")
-
-with col4:
-    fig = plot_membership(service_range, [service_low, service_medium, service_high], service_score, "Service Quality")
-    st.pyplot(fig)
-    st.subheader("Membership Values (Service)")
-    sc1, sc2, sc3 = st.columns(3)
-    sc1.metric("Bad", f"{service_membership[0]:.2f}")
-    sc2.metric("Decent", f"{service_membership[1]:.2f}")
-    sc3.metric("Great", f"{service_membership[2]:.2f}")
-
-# --- Manual fuzzy inference (rule activation & visualization) ---
-# Interpolated values
-qual_lo = fuzz.interp_membership(quality_range, quality_low, quality_score)
-qual_md = fuzz.interp_membership(quality_range, quality_medium, quality_score)
-qual_hi = fuzz.interp_membership(quality_range, quality_high, quality_score)
-
-serv_lo = fuzz.interp_membership(service_range, service_low, service_score)
-serv_md = fuzz.interp_membership(service_range, service_medium, service_score)
-serv_hi = fuzz.interp_membership(service_range, service_high, service_score)
-
-# Apply rules
-active_rule1 = np.fmax(qual_lo, serv_lo)
-tip_activation_lo = np.fmin(active_rule1, tip_low)
-
-tip_activation_md = np.fmin(serv_md, tip_medium)
+    score_rule = alt.Chart(pd.DataFrame({'x': [score]})).mark_rule(
+        color='black', strokeDash=[5, 5], strokeWidth=1.5).encode(x='x:Q')
 
-active_rule3 = np.fmax(qual_hi, serv_hi)
-tip_activation_hi = np.fmin(active_rule3, tip_high)
+    return (lines + score_rule).properties(title=title, height=250)
 
 
 # Plot rule activation (manual inference)
 def plot_fuzzy_output_activity(x_tip, tip_lo, tip_md, tip_hi,
                                 tip_activation_lo, tip_activation_md, tip_activation_hi):
-    fig, ax = plt.subplots(figsize=(7, 3))
-    tip0 = np.zeros_like(x_tip)
-
-    ax.fill_between(x_tip, tip0, tip_activation_lo, facecolor='#1f77b4', alpha=0.6, label='Rule 1 (Low Tip)')
-    ax.plot(x_tip, tip_lo, '--', color='#1f77b4', linewidth=1)
-
-    ax.fill_between(x_tip, tip0, tip_activation_md, facecolor='#2ca02c', alpha=0.6, label='Rule 2 (Med Tip)')
-    ax.plot(x_tip, tip_md, '--', color='#2ca02c', linewidth=1)
-
-    ax.fill_between(x_tip, tip0, tip_activation_hi, facecolor='#d62728', alpha=0.6, label='Rule 3 (High Tip)')
-    ax.plot(x_tip, tip_hi, '--', color='#d62728', linewidth=1)
-
-    ax.set_title("🔥 Output Membership Activity (Rule Contribution)", fontsize=13, weight='bold')
-    ax.set_ylim([-0.05, 1.05])
-    ax.set_xticks(np.arange(min(x_tip), max(x_tip) + 0.1, 2.5))
-    ax.grid(True, linestyle='--', linewidth=0.4, alpha=0.3)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.tick_params(axis='both', labelsize=10)
-    ax.legend(loc='upper right', frameon=False)
-
-    fig.tight_layout()
-    return fig
-
-
-with st.expander("📚 Description of Fuzzy Rules"):
-    st.markdown("""
-    ### 🧠 Inference Rules Explained
-
-    The fuzzy logic system uses **three simple rules** to determine the appropriate tip based on quality and service:
-
-    **🔵 Rule 1**:  
-    *If food quality is bad **OR** service is bad → then tip should be low.*  
-    This rule handles poor experiences.
-
-    **🟢 Rule 2**:  
-    *If service is decent → then tip should be medium.*  
-    This rule ensures acceptable service is rewarded fairly.
-
-    **🔴 Rule 3**:  
-    *If food quality is great **OR** service is great → then tip should be high.*  
-    This rule captures excellent experiences.
-
-    These rules are combined using fuzzy operators and used to determine the degree of activation of each output level (low, medium, high).
-    """)
-
+    rules = ['Rule 1 (Low Tip)', 'Rule 2 (Med Tip)', 'Rule 3 (High Tip)']
+    activations = [tip_activation_lo, tip_activation_md, tip_activation_hi]
+
+    areas = alt.Chart(melt_mfs(x_tip, activations, rules)).mark_area(opacity=0.6).encode(
+        x=alt.X('x:Q', title=None, axis=alt.Axis(values=np.arange(0, 26, 2.5).tolist())),
+        y=alt.Y('membership:Q', title=None, scale=alt.Scale(domain=[-0.05, 1.05])),
+        color=alt.Color('label:N', title=None, sort=None,
+                        scale=alt.Scale(domain=rules, range=mf_colors),
+                        legend=alt.Legend(orient='top-right')),
+    )
 
-with st.expander("📊 Rule Activation Output Visualization"):
-    fig = plot_fuzzy_output_activity(
-        tip_range,
-        tip_low, tip_medium, tip_high,
-        tip_activation_lo, tip_activation_md, tip_activation_hi
+    outlines = alt.Chart(melt_mfs(x_tip, [tip_lo, tip_md, tip_hi], rules)).mark_line(
+        strokeDash=[4, 4], strokeWidth=1).encode(
+        x='x:Q',
+        y='membership:Q',
+        color=alt.Color('label:N', scale=alt.Scale(domain=rules, range=mf_colors), legend=None),
     )
-    st.pyplot(fig)
+
+    return (areas + outlines).properties(
+        title='🔥 Output Membership Activity (Rule Contribution)', height=250)
 
 
 def plot_final_tip_output(x_tip, tip_lo, tip_md, tip_hi, final_tip):
-    fig, ax = plt.subplots(figsize=(7, 3))
+    labels = ['Low', 'Medium', 'High']
 
     # Plot each tip level
-    ax.plot(x_tip, tip_lo, color='#1f77b4', linewidth=2.5, label='Low')
-    ax.plot(x_tip, tip_md, color='#2ca02c', linewidth=2.5, label='Medium')
-    ax.plot(x_tip, tip_hi, color='#d62728', linewidth=2.5, label='High')
+    lines = alt.Chart(melt_mfs(x_tip, [tip_lo, tip_md, tip_hi], labels)).mark_line(strokeWidth=2.5).encode(
+        x=alt.X('x:Q', title=None, axis=alt.Axis(values=np.arange(0, 26, 2.5).tolist())),
+        y=alt.Y('membership:Q', title=None, scale=alt.Scale(domain=[-0.05, 1.05])),
+        color=alt.Color('label:N', title=None, sort=None,
+                        scale=alt.Scale(domain=labels, range=mf_colors),
+                        legend=alt.Legend(orient='bottom')),
+    )
 
     # Vertical line for defuzzified tip
-    ax.axvline(final_tip, color='black', linestyle='--', linewidth=2, label=f"Defuzzified Tip: {final_tip:.2f}")
+    tip_df = pd.DataFrame({'x': [final_tip], 'y': [1.0],
+                           'text': [f"Defuzzified Tip: {final_tip:.2f}"]})
+    tip_rule = alt.Chart(tip_df).mark_rule(
+        color='black', strokeDash=[5, 5], strokeWidth=2).encode(x='x:Q')
+    tip_label = alt.Chart(tip_df).mark_text(
+        align='left', dx=5, fontWeight='bold').encode(x='x:Q', y='y:Q', text='text:N')
+
+    return (lines + tip_rule + tip_label).properties(
+        title='Final Tip Output (Defuzzified)', height=250)
+
+
+# --- Batch inference over the whole input grid ---
+@st.cache_data
+def compute_tip_surface():
+    # Fuzzification, rule firing and centroid for every (quality,
+    # service) pair in a handful of broadcasts - no Python loop over
+    # per-pair compute() calls
+    def trimf_grid(x, params):
+        a, b, c = params
+        rising = (x - a) / (b - a) if b > a else np.ones_like(x)
+        falling = (c - x) / (c - b) if c > b else np.ones_like(x)
+        return np.clip(np.minimum(rising, falling), 0.0, None)
+
+    Q, S = np.meshgrid(quality_range.astype(float), service_range.astype(float), indexing='ij')
+
+    strengths = np.stack([
+        np.maximum(trimf_grid(Q, quality_params[0]), trimf_grid(S, service_params[0])),
+        trimf_grid(S, service_params[1]),
+        np.maximum(trimf_grid(Q, quality_params[2]), trimf_grid(S, service_params[2])),
+    ])                                                        # (3, 11, 11)
+
+    activations = np.minimum(tip_mfs[:, None, None, :], strengths[..., None])
+    aggregated = activations.max(axis=0)                      # (11, 11, 26)
+    return (aggregated * tip_range).sum(axis=-1) / aggregated.sum(axis=-1)
+
+
+def build_tip_surface_chart():
+    surface = compute_tip_surface()
+
+    Q, S = np.meshgrid(quality_range.astype(int), service_range.astype(int), indexing='ij')
+    df = pd.DataFrame({'quality': Q.ravel(), 'service': S.ravel(), 'tip': surface.ravel()})
+
+    return alt.Chart(df).mark_rect().encode(
+        x=alt.X('service:O', title='Service'),
+        y=alt.Y('quality:O', sort='descending', title='Food Quality'),
+        color=alt.Color('tip:Q', title='Tip (%)', scale=alt.Scale(scheme='viridis')),
+    ).properties(title='Recommended Tip (%) per Input Pair', height=400)
+
+
+# --- Interactive section ---
+# Fragment-scoped: moving a slider reruns only this function, skipping
+# the page config, header and module-level setup above
+@st.fragment
+def inference_section():
+    # --- User inputs ---
+    col1, col2 = st.columns(2)
+    with col1:
+        quality_score = st.slider("Rate the *Food Quality*", 0, 10, 5, 1)
+    with col2:
+        service_score = st.slider("Rate the *Service*", 0, 10, 5, 1)
+
+    quality_membership = get_membership_values(quality_params, quality_score)
+    service_membership = get_membership_values(service_params, service_score)
+
+    # --- Show plots and membership values ---
+    col3, col4 = st.columns(2)
+    with col3:
+        chart = plot_membership(quality_range, [quality_low, quality_medium, quality_high], quality_score, "Food Quality")
+        st.altair_chart(chart, use_container_width=True)
+        st.subheader("Membership Values (Quality)")
+        qc1, qc2, qc3 = st.columns(3)
+        qc1.metric("Bad", f"{quality_membership[0]:.2f}")
+        qc2.metric("Decent", f"{quality_membership[1]:.2f}")
+        qc3.metric("Great", f"{quality_membership[2]:.2f}")
+
+    with col4:
+        chart = plot_membership(service_range, [service_low, service_medium, service_high], service_score, "Service Quality")
+        st.altair_chart(chart, use_container_width=True)
+        st.subheader("Membership Values (Service)")
+        sc1, sc2, sc3 = st.columns(3)
+        sc1.metric("Bad", f"{service_membership[0]:.2f}")
+        sc2.metric("Decent", f"{service_membership[1]:.2f}")
+        sc3.metric("Great", f"{service_membership[2]:.2f}")
+
+    # --- Manual fuzzy inference (rule activation & visualization) ---
+    # Reuse the membership grades computed for the metrics above instead
+    # of fuzzifying the same scores a second time
+    qual_lo, qual_md, qual_hi = quality_membership
+    serv_lo, serv_md, serv_hi = service_membership
+
+    tip_activation_lo, tip_activation_md, tip_activation_hi = infer_activations(
+        qual_lo, qual_hi, serv_lo, serv_md, serv_hi, tip_mfs
+    )
+
+    with st.expander("📚 Description of Fuzzy Rules"):
+        st.markdown("""
+        ### 🧠 Inference Rules Explained
 
-    # Styling
-    ax.set_title("Final Tip Output (Defuzzified)", fontsize=13, weight='bold')
-    ax.set_ylim([-0.05, 1.05])
-    ax.set_xticks(np.arange(min(x_tip), max(x_tip) + 0.1, 2.5))
-    ax.grid(True, linestyle='--', linewidth=0.4, alpha=0.3)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.tick_params(axis='both', labelsize=10)
-    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.2), ncol=2, frameon=False)
+        The fuzzy logic system uses **three simple rules** to determine the appropriate tip based on quality and service:
 
-    fig.tight_layout()
-    return fig
+        **🔵 Rule 1**:  
+        *If food quality is bad **OR** service is bad → then tip should be low.*  
+        This rule handles poor experiences.
 
+        **🟢 Rule 2**:  
+        *If service is decent → then tip should be medium.*  
+        This rule ensures acceptable service is rewarded fairly.
 
-with st.expander("💡 Tip Inference (Defuzzification)"):
-    # Define fuzzy variables
-    quality = ctrl.Antecedent(quality_range, 'quality')
-    service = ctrl.Antecedent(service_range, 'service')
-    tip = ctrl.Consequent(tip_range, 'tip')
+        **🔴 Rule 3**:  
+        *If food quality is great **OR** service is great → then tip should be high.*  
+        This rule captures excellent experiences.
 
-    quality['low'] = quality_low
-    quality['medium'] = quality_medium
-    quality['high'] = quality_high
+        These rules are combined using fuzzy operators and used to determine the degree of activation of each output level (low, medium, high).
+        """)
 
-    service['low'] = service_low
-    service['medium'] = service_medium
-    service['high'] = service_high
+    with st.expander("📊 Rule Activation Output Visualization"):
+        chart = plot_fuzzy_output_activity(
+            tip_range,
+            tip_low, tip_medium, tip_high,
+            tip_activation_lo, tip_activation_md, tip_activation_hi
+        )
+        st.altair_chart(chart, use_container_width=True)
 
-    tip['low'] = tip_low
-    tip['medium'] = tip_medium
-    tip['high'] = tip_high
+    with st.expander("📈 Tipping Surface (batch inference)"):
+        st.altair_chart(build_tip_surface_chart(), use_container_width=True)
 
-    # Define rules
-    rule1 = ctrl.Rule(quality['low'] | service['low'], tip['low'])
-    rule2 = ctrl.Rule(service['medium'], tip['medium'])
-    rule3 = ctrl.Rule(service['high'] | quality['high'], tip['high'])
+    with st.expander("💡 Tip Inference (Defuzzification)"):
+        if defuzz_tip is not None:
+            # Whole pipeline in one typed C call - no interpreter
+            # dispatch between fuzzification and centroid
+            final_tip = defuzz_tip(float(quality_score), float(service_score))
+        else:
+            # Exact centroid of the aggregated output set straight from
+            # the rule strengths - no sampled integration, so the result
+            # does not depend on the tip universe's resolution
+            final_tip = defuzz_exact(max(qual_lo, serv_lo), serv_md, max(qual_hi, serv_hi))
 
-    tipping_ctrl = ctrl.ControlSystem([rule1, rule2, rule3])
-    tipping_sim = ctrl.ControlSystemSimulation(tipping_ctrl)
+        st.success(f"💰Recommended Tip: **{final_tip:.2f}%**")
 
-    tipping_sim.input['quality'] = quality_score
-    tipping_sim.input['service'] = service_score
-    tipping_sim.compute()
+        # Tip output plot
+        chart = plot_final_tip_output(tip_range, tip_low, tip_medium, tip_high, final_tip)
+        st.altair_chart(chart, use_container_width=True)
 
-    st.success(f"💰Recommended Tip: **{tipping_sim.output['tip']:.2f}%**")
 
-    # Tip output plot
-    fig = plot_final_tip_output(tip_range, tip_low, tip_medium, tip_high, tipping_sim.output['tip'])
-    st.pyplot(fig)
+inference_section()